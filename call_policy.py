@@ -0,0 +1,230 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Defaults for how a single LLM call is allowed to behave
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 20.0
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 30.0
+DEFAULT_MAX_COOLDOWN = 300.0
+DEFAULT_MAX_WORKERS = 4
+
+
+class CallTimeoutError(Exception):
+    pass
+
+
+class LatencyTracker:
+    """Record call latencies and report percentiles for a run."""
+
+    def __init__(self):
+        self._samples = []
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.hedges = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def record_hedge(self):
+        with self._lock:
+            self.hedges += 1
+
+    def count(self):
+        return len(self._samples)
+
+    def percentile(self, pct):
+        """Nearest-rank percentile of the recorded latencies, or None if there are none."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, int(round(pct / 100 * len(samples))))
+        return samples[min(rank, len(samples)) - 1]
+
+    def report(self, label="LLM calls"):
+        """Return a one-line summary of latency percentiles and failure counts."""
+        if not self._samples:
+            return f"{label}: no successful calls ({self.failures} failed)"
+        p50, p95, p99 = (self.percentile(p) for p in (50, 95, 99))
+        return (
+            f"{label}: {self.count()} ok, {self.failures} failed, {self.hedges} hedged | "
+            f"p50={p50:.2f}s p95={p95:.2f}s p99={p99:.2f}s"
+        )
+
+
+class CircuitBreaker:
+    """
+    Pause dispatch after repeated consecutive failures.
+
+    Once `failure_threshold` failures happen in a row the breaker opens and every caller
+    waits out the cooldown instead of firing more requests at a provider that is down.
+    After the cooldown one trial call is let through while the other callers keep
+    waiting; if it fails the cooldown doubles (up to `max_cooldown`), if it succeeds the
+    breaker closes again.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN, max_cooldown=DEFAULT_MAX_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._cooldown = cooldown
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._state_changed = threading.Condition()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        """
+        Block until the breaker allows a call to be dispatched.
+
+        Returns True when the caller is the half-open trial call; its outcome must be
+        reported with `record_success` or `record_failure(trial=True)`.
+        """
+        announced = False
+        with self._state_changed:
+            while True:
+                if self._opened_at is None:
+                    return False
+                remaining = self._opened_at + self._cooldown - time.monotonic()
+                if remaining <= 0 and not self._trial_in_flight:
+                    # Half-open: let a single trial call through
+                    self._trial_in_flight = True
+                    return True
+                if not announced and remaining > 0:
+                    print(f"Circuit breaker open, pausing LLM calls for {remaining:.1f}s...")
+                    announced = True
+                # Wake up when the cooldown ends or the trial call reports back
+                self._state_changed.wait(timeout=remaining if remaining > 0 else None)
+
+    def record_success(self):
+        with self._state_changed:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+            self._cooldown = self.base_cooldown
+            self._state_changed.notify_all()
+
+    def record_failure(self, trial=False):
+        with self._state_changed:
+            self._consecutive_failures += 1
+            if trial:
+                # Trial call failed, back off further
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                self._state_changed.notify_all()
+            elif self._opened_at is None and self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class CallPolicy:
+    """
+    Run a callable with a per-call deadline, bounded jittered retries, optional hedging
+    and a circuit breaker.
+
+    The callable receives the remaining timeout in seconds so it can pass it on to the
+    underlying client. Hedging fires one duplicate request once the first attempt has
+    been outstanding longer than the observed p95 latency, and takes whichever returns
+    first. `max_workers` bounds how many requests (including hedges) are in flight at
+    once when the policy is shared by concurrent callers.
+    """
+
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_base=DEFAULT_BACKOFF_BASE,
+        backoff_cap=DEFAULT_BACKOFF_CAP,
+        hedge=False,
+        hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES,
+        retryable_errors=(Exception,),
+        breaker=None,
+        tracker=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.retryable_errors = tuple(retryable_errors) + (CallTimeoutError,)
+        self.breaker = breaker or CircuitBreaker()
+        self.tracker = tracker or LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def call(self, fn):
+        """Call `fn(timeout)` under the policy; re-raise the last error if every attempt fails."""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            trial = self.breaker.before_call()
+            start = time.monotonic()
+            try:
+                result = self._attempt(fn)
+            except self.retryable_errors as e:
+                last_error = e
+                self.breaker.record_failure(trial=trial)
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                # The provider answered (e.g. a bad request), so it isn't an outage
+                self.breaker.record_success()
+                self.tracker.record_failure()
+                raise
+            self.breaker.record_success()
+            self.tracker.record(time.monotonic() - start)
+            return result
+
+        self.tracker.record_failure()
+        raise last_error
+
+    def _attempt(self, fn):
+        end = time.monotonic() + self.timeout
+        pending = {self._executor.submit(fn, self.timeout)}
+
+        hedge_after = self._hedge_delay()
+        if hedge_after is not None and hedge_after < self.timeout:
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done:
+                self.tracker.record_hedge()
+                pending.add(self._executor.submit(fn, end - time.monotonic()))
+
+        error = None
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise CallTimeoutError(f"LLM call exceeded {self.timeout:.1f}s deadline.")
+
+    def _hedge_delay(self):
+        """Seconds to wait before hedging, or None when hedging is off or there is too little data."""
+        if not self.hedge or self.tracker.count() < self.hedge_min_samples:
+            return None
+        return self.tracker.percentile(95)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import math
+import os
+import re
+import numpy as np
+
+DEFAULT_TOP_K = 20
+DEFAULT_MIN_CONFIDENCE = 0.3
+# Cosine similarity of a related value/product pair is lower than a lexical match score
+DEFAULT_MIN_EMBEDDING_CONFIDENCE = 0.35
+# Values scoring below this fraction of the best score are not worth a slot in the top K
+MIN_RELATIVE_SCORE = 0.25
+# The best value must beat the first value cut from the top K by this factor
+MIN_MARGIN = 1.5
+
+# Value embeddings are saved here per facet, keyed by the value list and model
+CACHE_FOLDER = "cache/candidate_index/"
+
+# Value indexes are built once per facet (and embedder) and reused for every product
+_index_cache = {}
+
+
+def _tokenize(text):
+    """Lowercase alphanumeric tokens, with a naive plural strip so 'skis' matches 'ski'."""
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens]
+
+
+class ValueEmbedder:
+    """Optional sentence-transformers model used to score candidates by meaning rather than words."""
+
+    def __init__(self, model_name):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("Embedding-based candidate pruning requires 'sentence-transformers'. Install it with: pip install sentence-transformers")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self._text_cache = {}
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), normalize_embeddings=True)
+
+    def encode_text(self, text):
+        """Encode a product text once, no matter how many facets score it."""
+        if text not in self._text_cache:
+            self._text_cache[text] = self.encode([text])[0]
+        return self._text_cache[text]
+
+
+class CandidateIndex:
+    """
+    Precomputed tokens, IDF weights and (optionally) embeddings for a facet's allowed values.
+
+    Embeddings are the expensive part, so they are loaded from `cache_path` when it exists
+    and written there otherwise; the lexical index is cheap and rebuilt each run.
+    """
+
+    def __init__(self, values, embedder=None, cache_path=None):
+        self.values = list(values)
+        self.value_tokens = [set(_tokenize(value)) for value in self.values]
+        self.value_phrases = [" ".join(_tokenize(value)) for value in self.values]
+
+        # Tokens shared by many values (e.g. a brand name) say little about which one fits
+        doc_freq = {}
+        for tokens in self.value_tokens:
+            for token in tokens:
+                doc_freq[token] = doc_freq.get(token, 0) + 1
+        self.idf = {token: math.log(1 + len(self.values) / df) for token, df in doc_freq.items()}
+
+        self.embedder = embedder
+        self.embeddings = self._load_embeddings(cache_path) if embedder else None
+
+    def _load_embeddings(self, cache_path):
+        if cache_path and os.path.exists(cache_path):
+            return np.load(cache_path)
+        embeddings = self.embedder.encode(self.values)
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            np.save(cache_path, embeddings)
+        return embeddings
+
+    def score(self, product_text):
+        """
+        Score every value against the product text.
+
+        Returns the lexical scores (0 to 1) and the embedding cosine similarities, or None
+        for the latter when no embedder is configured.
+        """
+        product_tokens = _tokenize(product_text)
+        product_token_set = set(product_tokens)
+        product_phrase = " " + " ".join(product_tokens) + " "
+
+        scores = []
+        for tokens, phrase in zip(self.value_tokens, self.value_phrases):
+            if phrase and f" {phrase} " in product_phrase:
+                scores.append(1.0)
+                continue
+            matched_tokens = [t for t in tokens if t in product_token_set]
+            if all(t.isdigit() for t in matched_tokens):
+                # A lone number (a size, a quantity) says nothing about e.g. 'Model 3'
+                scores.append(0.0)
+                continue
+            total = sum(self.idf[t] for t in tokens)
+            matched = sum(self.idf[t] for t in matched_tokens)
+            scores.append(matched / total if total else 0.0)
+
+        similarities = None
+        if self.embeddings is not None:
+            similarities = [float(s) for s in self.embeddings @ self.embedder.encode_text(product_text)]
+        return scores, similarities
+
+
+def _cache_path(facet_name, values, embedder):
+    """Disk location of a facet's value embeddings, keyed by the value list and model name."""
+    key = hashlib.sha256(json.dumps([embedder.model_name, list(values)]).encode("utf-8")).hexdigest()[:16]
+    safe_name = re.sub(r"[^\w-]+", "_", facet_name)
+    return os.path.join(CACHE_FOLDER, f"{safe_name}-{key}.npy")
+
+
+def get_candidate_index(facet_name, values, embedder=None):
+    """Return the cached index for a facet, building it the first time it's needed."""
+    key = (facet_name, tuple(values), embedder.model_name if embedder else None)
+    if key not in _index_cache:
+        cache_path = _cache_path(facet_name, values, embedder) if embedder else None
+        _index_cache[key] = CandidateIndex(values, embedder, cache_path)
+    return _index_cache[key]
+
+
+def prune_candidates(facet_name, product_text, values, top_k=DEFAULT_TOP_K, embedder=None,
+                     min_confidence=DEFAULT_MIN_CONFIDENCE, min_embedding_confidence=DEFAULT_MIN_EMBEDDING_CONFIDENCE):
+    """
+    Return the `top_k` allowed values most relevant to the product, in their original order.
+
+    Lexical and embedding scores are each divided by their own confidence threshold and
+    a value is ranked by the larger of the two, so a match by meaning alone can enable
+    pruning. Only values scoring at least MIN_RELATIVE_SCORE of the best are kept, so
+    the result can be shorter than `top_k`.
+
+    The full list is returned when pruning is disabled (`top_k` of 0/None), when the
+    list is already short enough, when no value reaches either threshold, or when the
+    best value doesn't clearly beat the values that would be cut, since then the right
+    value may not be in the top K.
+    """
+    if not top_k or len(values) <= top_k:
+        return values
+
+    lexical, similarities = get_candidate_index(facet_name, values, embedder).score(product_text)
+    scores = [score / min_confidence for score in lexical]
+    if similarities is not None:
+        scores = [max(score, similarity / min_embedding_confidence) for score, similarity in zip(scores, similarities)]
+    best = max(scores)
+    if best < 1:
+        return values
+
+    ranked = [
+        i for i in sorted(range(len(values)), key=lambda i: scores[i], reverse=True)
+        if scores[i] > 0 and scores[i] >= MIN_RELATIVE_SCORE * best
+    ]
+    if len(ranked) > top_k and scores[ranked[top_k]] * MIN_MARGIN > best:
+        return values
+    return [values[i] for i in sorted(ranked[:top_k])]
@@ -0,0 +1,207 @@
+import os
+import time
+from dotenv import load_dotenv
+from call_policy import CallPolicy, DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES
+
+load_dotenv()
+
+# Names accepted by get_backend() and by the per-facet 'backend' config key
+BACKEND_NAMES = ("openai", "openai-compatible", "zero-shot", "llama-cpp")
+DEFAULT_BACKEND = "openai"
+
+
+class ClassifierBackend:
+    """
+    Base class for the models that classify products and suggest facets.
+
+    Prompt-based backends only need to implement `_complete`; every call goes through
+    the backend's CallPolicy. Backends that can score many products at once should
+    override `classify_batch`.
+    """
+
+    name = None
+
+    def __init__(self, model, policy=None):
+        self.model = model
+        self.policy = policy or CallPolicy()
+
+    def latency_report(self):
+        """Summary of p50/p95/p99 latency and failures for calls made by this backend."""
+        return self.policy.tracker.report(f"{self.name} calls")
+
+    def _complete(self, prompt, temperature, timeout):
+        """Return the model's text response to a single user prompt."""
+        raise NotImplementedError
+
+    def _chat(self, prompt, temperature):
+        """Send a prompt through the call policy."""
+        return self.policy.call(lambda timeout: self._complete(prompt, temperature, timeout))
+
+    def _timed(self, fn):
+        """Run an in-process call, recording its latency without the policy's deadline/retries."""
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception:
+            self.policy.tracker.record_failure()
+            raise
+        self.policy.tracker.record(time.monotonic() - start)
+        return result
+
+    def classify_facet_value(self, product_text, facet_name, candidate_values, multi_valued, required_response, vendor):
+        """Classify a product into facet value(s). Returns None if the call failed."""
+        if not candidate_values:
+            raise ValueError("Candidate facet values must be provided.")
+
+        prompt = self._build_assignment_prompt(product_text, facet_name, candidate_values, multi_valued, required_response, vendor)
+
+        try:
+            return self._chat(prompt, temperature=0)
+        except Exception as e:
+            print(f"{self.name} error: {e}")
+            return None
+
+    def classify_batch(self, requests):
+        """
+        Classify many products at once.
+
+        Each request is a dict of `classify_facet_value` keyword arguments; the responses
+        come back in the same order. The default implementation calls the model one
+        request at a time.
+        """
+        return [self.classify_facet_value(**request) for request in requests]
+
+    def _build_assignment_prompt(self, product_text, facet_name, candidate_values, multi_valued, required_response, vendor):
+        """Internal method to build the prompt text."""
+        candidate_list = "\n".join(f"- {value}" for value in candidate_values)
+        if multi_valued and not required_response:
+            instruction = (
+                f"The goal is to classify the above product from {vendor}."
+                f" Choose all {facet_name} values from the list below that apply to the product."
+                " If none apply, respond with 'None'. Respond only with a comma-separated list of the matching values or 'None'."
+            )
+        elif not multi_valued and not required_response:
+            instruction = (
+                f"The goal is to classify the above product from {vendor}."
+                f" Choose the single best {facet_name} value from the list below for the product."
+                " If none apply, respond with 'None'. Respond only with ONE value or 'None'."
+            )
+        elif multi_valued and required_response:
+            instruction = (
+                f"The goal is to classify the above product from {vendor}."
+                f" Choose all {facet_name} values from the list below that apply to the product."
+                " Respond only with a comma-separated list of the matching values."
+            )
+        else:
+            instruction = (
+                f"The goal is to classify the above product from {vendor}."
+                f" Choose the single best {facet_name} value from the list below for the product."
+                " Respond only with ONE value."
+            )
+
+        prompt = (
+            f"Product Information:\n{product_text}\n\n"
+            f"{instruction}\n"
+            f"Candidate {facet_name} values:\n{candidate_list}"
+        )
+
+        return prompt
+
+    def suggest_facet_values(self, catalog_snippets, facet_name, existing_values, company_name):
+        """Suggest new facet values not currently listed."""
+        prompt = self._build_value_suggestion_prompt(catalog_snippets, facet_name, existing_values, company_name)
+        try:
+            return self._chat(prompt, temperature=0.2)
+        except Exception as e:
+            print(f"{self.name} error (suggest_facet_values): {e}")
+            return None
+
+    def _build_value_suggestion_prompt(self, keywords_str, facet_name, existing_values, company_name):
+        """Build prompt for suggesting new facet values."""
+        existing_list = ", ".join(f"{value}" for value in existing_values)
+        if company_name == "Unknown Company":
+            company_name = "an unknown company"
+        prompt = (
+            f"The goal is to suggest new facet values to categorize the product catalog of {company_name}. "
+            "Based on the following keywords that appear in product descriptions most often, suggest up to 5 new category values"
+            "If less than 5 new facets values make sense, respond with only those that do."
+            f" under the facet '{facet_name}' that are clearly applicable and distinct from the existing allowed values. "
+            f"Respone with a comma seperated list. If no new values make sense, respond with 'None'.\n"
+            f"Existing values for facet '{facet_name}': {existing_list}. \n"
+            f"Keywords: {keywords_str}"
+        )
+        return prompt
+    
+    def suggest_new_facets(self, keywords_str, existing_facets, company_name):
+        """
+        Suggest entirely new facets based on product keywords.
+        """
+        prompt = self._build_new_facets_with_values_prompt(keywords_str, existing_facets, company_name)
+        try:
+            return self._chat(prompt, temperature=0.2)
+        except Exception as e:
+            print(f"{self.name} error (suggest_new_facets): {e}")
+            return None
+
+    def _build_new_facets_with_values_prompt(self, keywords_str, existing_facets, company_name):
+        """
+        Build the prompt for suggesting entirely new facets along with their allowed values.
+        """
+        existing_list = "\n".join(f"{facet}: {', '.join(values)}" for facet, values in existing_facets.items())
+        if company_name == "Unknown Company":
+            company_name = "an unknown company"
+        prompt = (
+            f"The goal is to suggest entirely new facets to categorize the product catalog of {company_name}. "
+            "For each new facet you recommend, provide a name and a list of allowed values. "
+            "Here is an example of an existing facet and its allowed values:\n"
+            "Color: Red, Blue, Green\n\n"
+            "Here are the existing facets and their allowed values:\n"
+            f"{existing_list}\n\n"
+            "Based on the following keywords that appear in product descriptions most often, suggest up to 10 new facets, with up to 5 allowed values each, "
+            "that are clearly applicable and distinct from the existing facets. For each facet, provide a name and a list of allowed values. "
+            "Only suggest new facets that are clearly applicable and distinct from the existing facets. "
+            "Respond in the format 'Facet Name: Value1, Value2, etc' on seperated lines without numbering. "
+            "If no new facets make sense, respond with 'None'.\n\n"
+            "If less than 10 new facets or less than 5 values per facet make sense, respond with only those that do. "
+            f"Keywords: {keywords_str}"
+        )
+        return prompt
+
+
+def get_backend(name=DEFAULT_BACKEND, model=None, base_url=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, hedge=False):
+    """
+    Construct a backend by name.
+
+    Optional dependencies are only imported when their backend is requested. When
+    `model` or `base_url` aren't given they are read from the environment (.env), so
+    facets can name a backend in the config without repeating its settings.
+    """
+    if name == "openai":
+        from openai_client import OpenAIClient
+        return OpenAIClient(model=model or os.getenv("OPENAI_MODEL", "gpt-4"), timeout=timeout, max_retries=max_retries, hedge=hedge)
+    if name == "openai-compatible":
+        from openai_client import OpenAICompatibleClient
+        return OpenAICompatibleClient(
+            base_url=base_url or os.getenv("LOCAL_LLM_URL"),
+            model=model or os.getenv("LOCAL_LLM_MODEL"),
+            timeout=timeout,
+            max_retries=max_retries,
+            hedge=hedge,
+        )
+    if name == "zero-shot":
+        from local_backends import ZeroShotClient, DEFAULT_ZERO_SHOT_MODEL
+        return ZeroShotClient(model=model or os.getenv("ZERO_SHOT_MODEL", DEFAULT_ZERO_SHOT_MODEL))
+    if name == "llama-cpp":
+        from local_backends import LlamaCppClient
+        return LlamaCppClient(model_path=model or os.getenv("LLAMA_CPP_MODEL_PATH"))
+    raise ValueError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKEND_NAMES)}.")
+
+
+def resolve_facet_backends(facets, default_backend, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, hedge=False):
+    """Map every backend name used by the facet config to a backend instance."""
+    backends = {default_backend.name: default_backend}
+    for facet_info in facets.values():
+        name = facet_info.get("backend")
+        if name and name not in backends:
+            backends[name] = get_backend(name, timeout=timeout, max_retries=max_retries, hedge=hedge)
+    return backends
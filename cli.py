@@ -1,5 +1,8 @@
 import typer
 from driver import run_full_pipeline
+from call_policy import DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES
+from classifier_backend import BACKEND_NAMES, DEFAULT_BACKEND
+from candidate_pruning import DEFAULT_TOP_K
 
 INPUT_FOLDER = "input/"
 OUTPUT_FOLDER = "output/"
@@ -26,6 +29,27 @@ def run(
     limit: int = typer.Option(
         5,
         help="Limit the number of products to be faceted. If not specified, all products will be processed."
+    ),
+    backend: str = typer.Option(
+        DEFAULT_BACKEND,
+        help=f"Classifier backend: {', '.join(repr(name) for name in BACKEND_NAMES)}.",
+        case_sensitive=False
+    ),
+    model: str = typer.Option(None, help="Model name for the backend (a GGUF file path for 'llama-cpp')."),
+    base_url: str = typer.Option(None, help="Base URL of the server for the 'openai-compatible' backend."),
+    candidate_top_k: int = typer.Option(
+        DEFAULT_TOP_K,
+        help="Send only the K most relevant allowed values of large facets to the classifier. 0 sends every value."
+    ),
+    candidate_embedding_model: str = typer.Option(
+        None,
+        help="sentence-transformers model used alongside keyword overlap to rank candidate values (e.g. all-MiniLM-L6-v2)."
+    ),
+    llm_timeout: float = typer.Option(DEFAULT_TIMEOUT, help="Deadline in seconds for each LLM call."),
+    llm_max_retries: int = typer.Option(DEFAULT_MAX_RETRIES, help="Retries (with jittered backoff) for a failed LLM call."),
+    hedge_requests: bool = typer.Option(
+        False,
+        help="Send a duplicate LLM request when a call runs longer than the observed p95 latency."
     )
 ):
     """
@@ -40,6 +64,21 @@ def run(
         typer.echo("Error: You must specify exactly one of --store-url or --product-file.")
         raise typer.Exit(code=1)
 
+    if llm_timeout <= 0:
+        typer.echo("Error: --llm-timeout must be greater than 0.")
+        raise typer.Exit(code=1)
+    if llm_max_retries < 0:
+        typer.echo("Error: --llm-max-retries must be 0 or greater.")
+        raise typer.Exit(code=1)
+    if candidate_top_k < 0:
+        typer.echo("Error: --candidate-top-k must be 0 or greater.")
+        raise typer.Exit(code=1)
+
+    backend = backend.lower()
+    if backend not in BACKEND_NAMES:
+        typer.echo(f"Error: Unknown backend '{backend}'. Choose one of: {', '.join(BACKEND_NAMES)}.")
+        raise typer.Exit(code=1)
+
     if product_file:
         product_file = INPUT_FOLDER + product_file
     if user_defined_facets:
@@ -60,7 +99,15 @@ def run(
         user_defined_facets=user_defined_facets,
         suggest_facet_values_option=suggest_facet_values,
         suggest_new_facets_option=suggest_new_facets,
-        limit=limit
+        limit=limit,
+        llm_timeout=llm_timeout,
+        llm_max_retries=llm_max_retries,
+        hedge_requests=hedge_requests,
+        backend_name=backend,
+        model=model,
+        base_url=base_url,
+        candidate_top_k=candidate_top_k,
+        candidate_embedding_model=candidate_embedding_model
     )
 
 if __name__ == "__main__":
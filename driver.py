@@ -5,8 +5,17 @@ from facet_loader import load_facet_config
 from facet_applier import apply_facets_to_products
 from suggest_facet_values import suggest_new_facet_values
 from suggest_new_facets import suggest_new_facets
+from classifier_backend import get_backend, resolve_facet_backends, DEFAULT_BACKEND
+from call_policy import DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES
+from candidate_pruning import ValueEmbedder, DEFAULT_TOP_K
+
+def run_full_pipeline(store_url, product_file, output_file, user_defined_facets, suggest_facet_values_option, suggest_new_facets_option, limit=None,
+                      llm_timeout=DEFAULT_TIMEOUT, llm_max_retries=DEFAULT_MAX_RETRIES, hedge_requests=False,
+                      backend_name=DEFAULT_BACKEND, model=None, base_url=None,
+                      candidate_top_k=DEFAULT_TOP_K, candidate_embedding_model=None):
+    # One backend for the whole run so latency stats and the circuit breaker are shared
+    backend = get_backend(backend_name, model=model, base_url=base_url, timeout=llm_timeout, max_retries=llm_max_retries, hedge=hedge_requests)
 
-def run_full_pipeline(store_url, product_file, output_file, user_defined_facets, suggest_facet_values_option, suggest_new_facets_option, limit=None):
     # Load products
     if store_url:
         products = get_products_from_shopify(store_url)
@@ -31,7 +40,7 @@ def run_full_pipeline(store_url, product_file, output_file, user_defined_facets,
                     continue
 
             # Suggest new values
-            suggested_values = suggest_new_facet_values(products, facet_name, existing_values["allowed_values"])
+            suggested_values = suggest_new_facet_values(products, facet_name, existing_values["allowed_values"], backend=backend)
             if not suggested_values:
                 print(f"No new values suggested for the facet '{facet_name}'.")
                 continue
@@ -44,7 +53,7 @@ def run_full_pipeline(store_url, product_file, output_file, user_defined_facets,
     # Suggest entirely new facets if enabled
     if suggest_new_facets_option.lower() in ("yes", "ask"):
         print("Suggesting new facets...")
-        new_facets = suggest_new_facets(products, {facet: config["allowed_values"] for facet, config in facets.items()})
+        new_facets = suggest_new_facets(products, {facet: config["allowed_values"] for facet, config in facets.items()}, backend=backend)
         for facet_name, suggested_values in new_facets.items():
             suggested_values_str = ", ".join(suggested_values)
             if suggest_new_facets_option.lower() == "ask":
@@ -111,11 +120,26 @@ def run_full_pipeline(store_url, product_file, output_file, user_defined_facets,
 
     # Apply facets to products
     print("Applying facets to products...")
-    labeled_products = apply_facets_to_products(products, facets)
+    facet_backends = resolve_facet_backends(facets, backend, timeout=llm_timeout, max_retries=llm_max_retries, hedge=hedge_requests)
+    embedder = ValueEmbedder(candidate_embedding_model) if candidate_embedding_model else None
+    labeled_products = apply_facets_to_products(
+        products,
+        facets,
+        backend=backend,
+        facet_backends=facet_backends,
+        top_k=candidate_top_k,
+        embedder=embedder,
+    )
 
     # Save labeled products to the output file
     with open(output_file, "w") as f:
         json.dump(labeled_products, f, indent=4)
     print(f"Labeled products saved to {output_file}")
 
+    retryable_count = sum(len(product.get("retryable_facets", [])) for product in labeled_products)
+    if retryable_count:
+        print(f"{retryable_count} facet classifications failed and are marked as 'retryable_facets' in the output.")
+    for facet_backend in facet_backends.values():
+        print(facet_backend.latency_report())
+
 
@@ -1,41 +1,90 @@
 import re
-from openai_client import OpenAIClient
+from classifier_backend import get_backend
+from candidate_pruning import prune_candidates, DEFAULT_TOP_K
 from pos_tagging import extract_keywords
 
 def _clean_tag_part(part):
     """Clean tag keys or values by removing leading/trailing punctuation."""
     return re.sub(r'^[^\w]+|[^\w]+$', '', part.strip())
 
-def apply_facets_to_products(products, facets):
-    """Apply user-defined facets to a list of products."""
-    labeled_products = []
-    openai_client = OpenAIClient()
+def apply_facets_to_products(products, facets, backend=None, facet_backends=None, top_k=DEFAULT_TOP_K, embedder=None):
+    """
+    Apply user-defined facets to a list of products.
+
+    Tag matches are resolved first; everything left over is sent to the classifier
+    backend in one batch per backend, so backends that can batch (e.g. a local model)
+    score many products at once. A facet config may set 'backend' to route it to a
+    backend in `facet_backends` instead of the default.
+
+    Facets with more than `top_k` allowed values (or the facet's own 'top_k') only
+    send the best-matching candidates to the classifier; see candidate_pruning.
+
+    Facets whose classification failed (as opposed to the model answering 'None') are
+    listed under 'retryable_facets' on the product so they can be re-run later instead
+    of being silently dropped or replaced by the default value.
+    """
+    if backend is None:
+        backend = get_backend()
+    facet_backends = facet_backends or {}
+
+    # Match from tags, queueing anything unmatched for the classifier
+    tag_matches = []
+    pending = {}
+    for product_index, product in enumerate(products):
+        matches = {}
+        product_text = None
+        candidate_text = None
+        for facet_name, facet_info in facets.items():
+            allowed_values = facet_info.get("allowed_values", [])
+            matches[facet_name] = match_tags(product, facet_name, allowed_values)
+
+            if not matches[facet_name] and allowed_values:
+                if product_text is None:
+                    description_keywords = extract_keywords(product.get('body_html', ''))
+                    product_text = build_product_text(product, description_keywords)
+                    candidate_text = build_candidate_text(product, description_keywords)
+                facet_backend = facet_backends.get(facet_info.get("backend"), backend)
+                pending.setdefault(facet_backend, []).append((product_index, facet_name, {
+                    "product_text": product_text,
+                    "facet_name": facet_name,
+                    "candidate_values": prune_candidates(
+                        facet_name,
+                        candidate_text,
+                        allowed_values,
+                        top_k=facet_info.get("top_k", top_k),
+                        embedder=embedder,
+                    ),
+                    "multi_valued": facet_info.get("multi_valued", False),
+                    "required_response": (facet_info.get("required", False) and (facet_info.get("default_value") is None)),
+                    "vendor": product.get("vendor", "Unknown Vendor"),
+                }))
+        tag_matches.append(matches)
+
+    # Classify everything a backend is responsible for in one batch
+    responses = {}
+    for facet_backend, queued in pending.items():
+        batch_responses = facet_backend.classify_batch([request for _, _, request in queued])
+        for (product_index, facet_name, _), response in zip(queued, batch_responses):
+            responses[(product_index, facet_name)] = response
 
-    for product in products:
+    labeled_products = []
+    for product_index, product in enumerate(products):
         applied_facets = {}
+        retryable_facets = []
 
         for facet_name, facet_info in facets.items():
-            allowed_values = facet_info.get("allowed_values", [])
-            multi_valued = facet_info.get("multi_valued", False)
             required = facet_info.get("required", False)
             default_value = facet_info.get("default_value", None)
+            matched_values = tag_matches[product_index][facet_name]
 
-            # Try matching from tags
-            matched_values = match_tags(product, facet_name, allowed_values)
-
-            # Try matching from OpenAI
-            if not matched_values and allowed_values:
-                product_text = build_product_text(product)
-                gpt_response = openai_client.classify_facet_value(
-                    product_text=product_text,
-                    facet_name=facet_name,
-                    candidate_values=allowed_values,
-                    multi_valued=multi_valued,
-                    required_response=(required and (default_value is None)),
-                    vendor=product.get("vendor", "Unknown Vendor"),
-                )
-                if gpt_response and gpt_response.lower() != "none":
-                    matched_values = [v.strip() for v in gpt_response.split(",") if v.strip() and v.strip().lower() != "none"]
+            if (product_index, facet_name) in responses:
+                response = responses[(product_index, facet_name)]
+                if response is None:
+                    # The call itself failed, don't fall back to the default
+                    retryable_facets.append(facet_name)
+                    continue
+                if response.lower() != "none":
+                    matched_values = [v.strip() for v in response.split(",") if v.strip() and v.strip().lower() != "none"]
 
             # Fallback to default if required
             if not matched_values and required:
@@ -44,11 +93,14 @@ def apply_facets_to_products(products, facets):
             if matched_values:
                 applied_facets[facet_name] = matched_values
 
-        labeled_products.append({
+        labeled_product = {
             "id": product.get("id"),
             "title": product.get("title"),
             "facets": applied_facets
-        })
+        }
+        if retryable_facets:
+            labeled_product["retryable_facets"] = retryable_facets
+        labeled_products.append(labeled_product)
 
     return labeled_products
 
@@ -69,14 +121,15 @@ def match_tags(product, facet_name, allowed_values):
                 matches.append(value)
     return matches
 
-def build_product_text(product):
+def build_product_text(product, description_keywords=None):
     """Combine various product fields for LLM input."""
     parts = []
     if product.get('vendor'):
         parts.append(f"We are categorizing products from {product.get('vendor')}.")
 
     parts.append(f"Title: {product.get('title', '')}")
-    description_keywords = extract_keywords(product.get('body_html', ''))
+    if description_keywords is None:
+        description_keywords = extract_keywords(product.get('body_html', ''))
     parts.append(f"Description Keywords: {', '.join(description_keywords)}")
 
     if isinstance(product.get('options'), list):
@@ -105,4 +158,28 @@ def build_product_text(product):
     if tags:
         parts.append(f"Tags: {', '.join(tags)}")
 
-    return "\n".join(parts)
\ No newline at end of file
+    return "\n".join(parts)
+
+def build_candidate_text(product, description_keywords=None):
+    """
+    Combine the product fields that can name a facet value, for candidate pruning.
+
+    Unlike build_product_text this leaves out labels, vendor boilerplate, the handle and
+    prices, which would otherwise match values such as 'Product X' or 'Model 2'.
+    """
+    parts = [product.get('title', '')]
+    if description_keywords is None:
+        description_keywords = extract_keywords(product.get('body_html', ''))
+    parts.extend(description_keywords)
+
+    if isinstance(product.get('options'), list):
+        for opt in product['options']:
+            if isinstance(opt, dict) and isinstance(opt.get("values"), list):
+                parts.extend(opt["values"])
+
+    if product.get('product_type'):
+        parts.append(product['product_type'])
+
+    parts.extend(product.get("tags", []))
+
+    return "\n".join(str(part) for part in parts if part)
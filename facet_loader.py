@@ -1,4 +1,5 @@
 import yaml
+from classifier_backend import BACKEND_NAMES
 
 class ConfigLoaderError(Exception):
     pass
@@ -25,6 +26,8 @@ def load_facet_config(config_path):
         multi_valued = facet_info.get("multi_valued", False)
         required = facet_info.get("required", False)
         default_value = facet_info.get("default_value", None)
+        backend = facet_info.get("backend", None)
+        top_k = facet_info.get("top_k", None)
 
         if allowed_values is None or not isinstance(allowed_values, list):
             raise ConfigLoaderError(f"'allowed_values' for facet '{facet_name}' must be a list.")
@@ -36,6 +39,10 @@ def load_facet_config(config_path):
             raise ConfigLoaderError(f"'required' for facet '{facet_name}' must be a boolean.")
         if default_value is not None and not isinstance(default_value, str):
             raise ConfigLoaderError(f"'default_value' for facet '{facet_name}' must be a string or null.")
+        if backend is not None and backend not in BACKEND_NAMES:
+            raise ConfigLoaderError(f"'backend' for facet '{facet_name}' must be one of: {', '.join(BACKEND_NAMES)}.")
+        if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 0):
+            raise ConfigLoaderError(f"'top_k' for facet '{facet_name}' must be a non-negative integer.")
         
         validated_facets[facet_name] = {
             "allowed_values": allowed_values,
@@ -43,6 +50,10 @@ def load_facet_config(config_path):
             "required": required,
             "default_value": default_value
         }
+        if backend is not None:
+            validated_facets[facet_name]["backend"] = backend
+        if top_k is not None:
+            validated_facets[facet_name]["top_k"] = top_k
 
     return validated_facets
 
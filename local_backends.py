@@ -0,0 +1,158 @@
+import math
+import os
+import threading
+from call_policy import CallPolicy
+from classifier_backend import ClassifierBackend
+
+DEFAULT_ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+DEFAULT_ZERO_SHOT_THRESHOLD = 0.5
+DEFAULT_BATCH_SIZE = 16
+
+
+class ZeroShotClient(ClassifierBackend):
+    """
+    In-process NLI zero-shot classifier (Hugging Face transformers) running on CPU.
+
+    Only classification is supported; there is no text generation, so the suggestion
+    operations return None. Every (product, candidate value) pair in a batch is scored
+    together, so products keep batching even when each has its own pruned candidate list.
+    """
+
+    name = "zero-shot"
+
+    def __init__(self, model=DEFAULT_ZERO_SHOT_MODEL, threshold=DEFAULT_ZERO_SHOT_THRESHOLD, batch_size=DEFAULT_BATCH_SIZE):
+        try:
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        except ImportError:
+            raise ImportError("The zero-shot backend requires 'transformers' and 'torch'. Install them with: pip install transformers torch")
+        super().__init__(model, CallPolicy(max_retries=0))
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.nli_model = AutoModelForSequenceClassification.from_pretrained(model)
+        self.nli_model.eval()
+
+        label_ids = {label.lower(): i for label, i in self.nli_model.config.label2id.items()}
+        self.entailment_id = next((i for label, i in label_ids.items() if label.startswith("entail")), None)
+        self.contradiction_id = next((i for label, i in label_ids.items() if label.startswith("contra")), None)
+        if self.entailment_id is None or self.contradiction_id is None:
+            raise ValueError(f"Model '{model}' is not an NLI model with entailment and contradiction labels.")
+
+    def classify_facet_value(self, product_text, facet_name, candidate_values, multi_valued, required_response, vendor):
+        return self.classify_batch([{
+            "product_text": product_text,
+            "facet_name": facet_name,
+            "candidate_values": candidate_values,
+            "multi_valued": multi_valued,
+            "required_response": required_response,
+            "vendor": vendor,
+        }])[0]
+
+    def classify_batch(self, requests):
+        """Score the (product, value) pairs of all requests in shared batches of `batch_size`."""
+        pairs = []
+        for request in requests:
+            if not request["candidate_values"]:
+                raise ValueError("Candidate facet values must be provided.")
+            template = f"The {request['facet_name']} of this product is {{}}."
+            for value in request["candidate_values"]:
+                pairs.append((request["product_text"], template.format(value)))
+
+        pair_logits = [None] * len(pairs)
+        for start in range(0, len(pairs), self.batch_size):
+            chunk = pairs[start:start + self.batch_size]
+            try:
+                pair_logits[start:start + len(chunk)] = self._timed(lambda: self._score_pairs(chunk))
+            except Exception as e:
+                print(f"{self.name} error: {e}")
+
+        responses = []
+        offset = 0
+        for request in requests:
+            count = len(request["candidate_values"])
+            request_logits = pair_logits[offset:offset + count]
+            offset += count
+            if any(logits is None for logits in request_logits):
+                # Part of this request's batch failed
+                responses.append(None)
+                continue
+            responses.append(self._format_response(
+                request["candidate_values"], request_logits, request["multi_valued"], request["required_response"]
+            ))
+        return responses
+
+    def _score_pairs(self, pairs):
+        """Return [contradiction, entailment] logits for each (premise, hypothesis) pair."""
+        encoded = self.tokenizer(
+            [premise for premise, _ in pairs],
+            [hypothesis for _, hypothesis in pairs],
+            return_tensors="pt",
+            padding=True,
+            truncation="only_first",
+        )
+        with self.torch.no_grad():
+            logits = self.nli_model(**encoded).logits
+        return logits[:, [self.contradiction_id, self.entailment_id]].tolist()
+
+    def _format_response(self, values, logits, multi_valued, required_response):
+        """Turn NLI logits into the same text format an LLM would return."""
+        # Each value on its own: entailment vs contradiction, independent of how many
+        # candidates there are
+        scores = [1 / (1 + math.exp(contradiction - entailment)) for contradiction, entailment in logits]
+
+        if multi_valued:
+            ranked = sorted(range(len(values)), key=lambda i: scores[i], reverse=True)
+            chosen = [values[i] for i in ranked if scores[i] >= self.threshold]
+            best = ranked[0]
+        else:
+            # Values compete: the highest entailment logit wins, as in the transformers pipeline
+            best = max(range(len(values)), key=lambda i: logits[i][1])
+            chosen = [values[best]] if scores[best] >= self.threshold else []
+        if not chosen and required_response:
+            chosen = [values[best]]
+        return ", ".join(chosen) if chosen else "None"
+
+    def suggest_facet_values(self, catalog_snippets, facet_name, existing_values, company_name):
+        print(f"The {self.name} backend cannot suggest facet values.")
+        return None
+
+    def suggest_new_facets(self, keywords_str, existing_facets, company_name):
+        print(f"The {self.name} backend cannot suggest new facets.")
+        return None
+
+
+class LlamaCppClient(ClassifierBackend):
+    """
+    In-process quantized LLM (a GGUF file loaded with llama-cpp-python) running on CPU.
+
+    Uses the same prompts as the hosted backends, so it supports every operation. A
+    running generation can't be cancelled, so calls run without the policy's deadline
+    and retries; a failure (e.g. a prompt longer than `n_ctx`) is reported once.
+    """
+
+    name = "llama-cpp"
+
+    def __init__(self, model_path, n_ctx=4096):
+        if not model_path:
+            raise ValueError("A GGUF model path is required for the llama-cpp backend (set LLAMA_CPP_MODEL_PATH or --model).")
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            raise ImportError("The llama-cpp backend requires 'llama-cpp-python'. Install it with: pip install llama-cpp-python")
+        super().__init__(model_path, CallPolicy(max_retries=0))
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=os.cpu_count(), verbose=False)
+        # The model isn't thread-safe
+        self._lock = threading.Lock()
+
+    def _chat(self, prompt, temperature):
+        return self._timed(lambda: self._complete(prompt, temperature, None))
+
+    def _complete(self, prompt, temperature, timeout):
+        with self._lock:
+            response = self.llm.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+            )
+        return response["choices"][0]["message"]["content"].strip()
@@ -1,138 +1,80 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 import openai
 from dotenv import load_dotenv
+from call_policy import CallPolicy, DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES
+from classifier_backend import ClassifierBackend
 
 load_dotenv()
 
-class OpenAIClient:
-    def __init__(self):
-        openai.api_key = os.getenv("OPENAI_KEY")
-        if openai.api_key is None:
-            raise ValueError("OPENAI_KEY not found in environment variables.")
+# Errors worth retrying; anything else (bad request, auth) fails immediately
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Requests sent at once by classify_batch
+DEFAULT_CONCURRENCY = 8
 
-    def classify_facet_value(self, product_text, facet_name, candidate_values, multi_valued, required_response, vendor, model="gpt-4"):
-        """Use OpenAI to classify a product into facet value(s)."""
-        if not candidate_values:
-            raise ValueError("Candidate facet values must be provided.")
+class OpenAIClient(ClassifierBackend):
+    name = "openai"
 
-        prompt = self._build_assignment_prompt(product_text, facet_name, candidate_values, multi_valued, required_response, vendor)
+    def __init__(self, model="gpt-4", timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, hedge=False, concurrency=DEFAULT_CONCURRENCY):
+        api_key = os.getenv("OPENAI_KEY")
+        if api_key is None:
+            raise ValueError("OPENAI_KEY not found in environment variables.")
+        self.concurrency = concurrency
+        super().__init__(model, self._build_policy(timeout, max_retries, hedge, concurrency))
+        self.client = self._build_client(api_key)
 
-        try:
-            response = openai.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-            output = response.choices[0].message.content.strip()
-            return output
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-            return None
+    def _build_policy(self, timeout, max_retries, hedge, concurrency):
+        return CallPolicy(
+            timeout=timeout,
+            max_retries=max_retries,
+            hedge=hedge,
+            retryable_errors=RETRYABLE_ERRORS,
+            # Room for a hedge alongside every concurrent request
+            max_workers=2 * concurrency,
+        )
 
-    def _build_assignment_prompt(self, product_text, facet_name, candidate_values, multi_valued, required_response, vendor):
-        """Internal method to build the prompt text."""
-        candidate_list = "\n".join(f"- {value}" for value in candidate_values)
-        if multi_valued and not required_response:
-            instruction = (
-                f"The goal is to classify the above product from {vendor}."
-                f" Choose all {facet_name} values from the list below that apply to the product."
-                " If none apply, respond with 'None'. Respond only with a comma-separated list of the matching values or 'None'."
-            )
-        elif not multi_valued and not required_response:
-            instruction = (
-                f"The goal is to classify the above product from {vendor}."
-                f" Choose the single best {facet_name} value from the list below for the product."
-                " If none apply, respond with 'None'. Respond only with ONE value or 'None'."
-            )
-        elif multi_valued and required_response:
-            instruction = (
-                f"The goal is to classify the above product from {vendor}."
-                f" Choose all {facet_name} values from the list below that apply to the product."
-                " Respond only with a comma-separated list of the matching values."
-            )
-        else:
-            instruction = (
-                f"The goal is to classify the above product from {vendor}."
-                f" Choose the single best {facet_name} value from the list below for the product."
-                " Respond only with ONE value."
-            )
+    def _build_client(self, api_key, base_url=None):
+        # Retries are handled by the call policy, not the SDK
+        return openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
 
-        prompt = (
-            f"Product Information:\n{product_text}\n\n"
-            f"{instruction}\n"
-            f"Candidate {facet_name} values:\n{candidate_list}"
+    def _complete(self, prompt, temperature, timeout):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            timeout=timeout,
         )
+        return response.choices[0].message.content.strip()
 
-        return prompt
+    def classify_batch(self, requests):
+        """Send up to `concurrency` classification requests at once, each through the call policy."""
+        if len(requests) <= 1 or self.concurrency <= 1:
+            return super().classify_batch(requests)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(lambda request: self.classify_facet_value(**request), requests))
 
-    def suggest_facet_values(self, catalog_snippets, facet_name, existing_values, company_name, model="gpt-4"):
-        """Use OpenAI to suggest new facet values not currently listed."""
-        prompt = self._build_value_suggestion_prompt(catalog_snippets, facet_name, existing_values, company_name)
-        try:
-            response = openai.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2
-            )
-            output = response.choices[0].message.content.strip()
-            return output
-        except Exception as e:
-            print(f"OpenAI API error (suggest_facet_values): {e}")
-            return None
 
-    def _build_value_suggestion_prompt(self, keywords_str, facet_name, existing_values, company_name):
-        """Build prompt for suggesting new facet values."""
-        existing_list = ", ".join(f"{value}" for value in existing_values)
-        if company_name == "Unknown Company":
-            company_name = "an unknown company"
-        prompt = (
-            f"The goal is to suggest new facet values to categorize the product catalog of {company_name}. "
-            "Based on the following keywords that appear in product descriptions most often, suggest up to 5 new category values"
-            "If less than 5 new facets values make sense, respond with only those that do."
-            f" under the facet '{facet_name}' that are clearly applicable and distinct from the existing allowed values. "
-            f"Respone with a comma seperated list. If no new values make sense, respond with 'None'.\n"
-            f"Existing values for facet '{facet_name}': {existing_list}. \n"
-            f"Keywords: {keywords_str}"
-        )
-        return prompt
-    
-    def suggest_new_facets(self, keywords_str, existing_facets, company_name, model="gpt-4"):
-        """
-        Use OpenAI to suggest entirely new facets based on product keywords.
-        """
-        prompt = self._build_new_facets_with_values_prompt(keywords_str, existing_facets, company_name)
-        try:
-            response = openai.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2
-            )
-            output = response.choices[0].message.content.strip()
-            return output
-        except Exception as e:
-            print(f"OpenAI API error (suggest_new_facets): {e}")
-            return None
-    
-    def _build_new_facets_with_values_prompt(self, keywords_str, existing_facets, company_name):
-        """
-        Build the prompt for suggesting entirely new facets along with their allowed values.
-        """
-        existing_list = "\n".join(f"{facet}: {', '.join(values)}" for facet, values in existing_facets.items())
-        if company_name == "Unknown Company":
-            company_name = "an unknown company"
-        prompt = (
-            f"The goal is to suggest entirely new facets to categorize the product catalog of {company_name}. "
-            "For each new facet you recommend, provide a name and a list of allowed values. "
-            "Here is an example of an existing facet and its allowed values:\n"
-            "Color: Red, Blue, Green\n\n"
-            "Here are the existing facets and their allowed values:\n"
-            f"{existing_list}\n\n"
-            "Based on the following keywords that appear in product descriptions most often, suggest up to 10 new facets, with up to 5 allowed values each, "
-            "that are clearly applicable and distinct from the existing facets. For each facet, provide a name and a list of allowed values. "
-            "Only suggest new facets that are clearly applicable and distinct from the existing facets. "
-            "Respond in the format 'Facet Name: Value1, Value2, etc' on seperated lines without numbering. "
-            "If no new facets make sense, respond with 'None'.\n\n"
-            "If less than 10 new facets or less than 5 values per facet make sense, respond with only those that do. "
-            f"Keywords: {keywords_str}"
-        )
-        return prompt
\ No newline at end of file
+class OpenAICompatibleClient(OpenAIClient):
+    """
+    Client for any server that speaks the OpenAI chat completions API (vLLM, llama.cpp
+    server, Ollama, TGI, ...), e.g. a self-hosted inference host or a local endpoint.
+    """
+
+    name = "openai-compatible"
+
+    def __init__(self, base_url, model, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, hedge=False, concurrency=DEFAULT_CONCURRENCY):
+        if not base_url:
+            raise ValueError("A base URL is required for the openai-compatible backend (set LOCAL_LLM_URL or --base-url).")
+        if not model:
+            raise ValueError("A model name is required for the openai-compatible backend (set LOCAL_LLM_MODEL or --model).")
+        # Most local servers ignore the key, but the SDK insists on one
+        api_key = os.getenv("LOCAL_LLM_KEY", "not-needed")
+        self.concurrency = concurrency
+        ClassifierBackend.__init__(self, model, self._build_policy(timeout, max_retries, hedge, concurrency))
+        self.client = self._build_client(api_key, base_url)
@@ -1,11 +1,12 @@
-from openai_client import OpenAIClient
+from classifier_backend import get_backend
 import pos_tagging  # Make sure pos_tagging is imported
 import random
 
 
-def suggest_new_facet_values(products, facet_name, existing_values):
+def suggest_new_facet_values(products, facet_name, existing_values, backend=None):
     """Suggest up to 2 new facet values based on catalog analysis."""
-    openai_client = OpenAIClient()
+    if backend is None:
+        backend = get_backend()
 
     company_name = products[0].get("vendor", "Unknown Company")
 
@@ -21,7 +22,7 @@ def suggest_new_facet_values(products, facet_name, existing_values):
 
     keywords_str = " ".join(all_keywords)
 
-    gpt_response = openai_client.suggest_facet_values(keywords_str, facet_name, existing_values, company_name)
+    gpt_response = backend.suggest_facet_values(keywords_str, facet_name, existing_values, company_name)
 
     if not gpt_response or gpt_response.lower() == "none":
         return []
@@ -1,12 +1,13 @@
-from openai_client import OpenAIClient
+from classifier_backend import get_backend
 import pos_tagging
 import random
 
-def suggest_new_facets(products, existing_facets):
+def suggest_new_facets(products, existing_facets, backend=None):
     """
     Suggest entirely new facets based on product data.
     """
-    openai_client = OpenAIClient()
+    if backend is None:
+        backend = get_backend()
 
     company_name = products[0].get("vendor", "Unknown Company")
 
@@ -21,11 +22,11 @@ def suggest_new_facets(products, existing_facets):
 
     keywords_str = " ".join(all_keywords)
 
-    # Use OpenAI to suggest new facets
-    gpt_response = openai_client.suggest_new_facets(keywords_str, existing_facets, company_name)
+    # Use the LLM to suggest new facets
+    gpt_response = backend.suggest_new_facets(keywords_str, existing_facets, company_name)
 
     if not gpt_response or gpt_response.lower() == "none":
-        return []
+        return {}
 
     # Parse GPT response into a dictionary of facets and their allowed values
     suggested_facets = {}